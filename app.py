@@ -1,12 +1,45 @@
+import hashlib
 import os
 from pathlib import Path
-from flask import Flask, jsonify, render_template
 
-from scraper import scrape_plans, analyze_big_small
+import orjson
+from flask import Flask, Response, render_template, request
+from flask.json.provider import JSONProvider
+
+from scraper import scrape_plans, analyze_big_small, warm_pool
+
+HTML_PATH = Path(__file__).resolve().parent / "hgzy.html"
+HTML_FILE_URL = HTML_PATH.as_uri() + "#/wingo_30s"
+
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY
+
+
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=_ORJSON_OPTS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _json(data) -> Response:
+    """JSON response tagged with a hash of its body; 304 when the client already has it."""
+    # orjson bytes skip the provider round-trip through str for the hot API routes
+    body = orjson.dumps(data, option=_ORJSON_OPTS)
+    tag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if request.if_none_match.contains_weak(tag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+    resp.set_etag(tag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 1
+    return resp
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
 
     @app.get("/")
     def index():
@@ -14,25 +47,35 @@ def create_app() -> Flask:
 
     @app.get("/api/plans")
     def api_plans():
-        script_dir = Path(__file__).resolve().parent
-        html_path = script_dir / "hgzy.html"
-        data = scrape_plans(html_path)
-        return jsonify(data)
+        data = scrape_plans(HTML_PATH, HTML_FILE_URL)
+        return _json(data)
 
     @app.get("/api/result")
     def api_result():
-        script_dir = Path(__file__).resolve().parent
-        html_path = script_dir / "hgzy.html"
-        data = scrape_plans(html_path)
+        data = scrape_plans(HTML_PATH, HTML_FILE_URL)
+        analysis = analyze_big_small(data.get("items") or [])
+        return _json({"result": analysis})
+
+    @app.get("/api/plans+result")
+    def api_plans_result():
+        data = scrape_plans(HTML_PATH, HTML_FILE_URL)
         analysis = analyze_big_small(data.get("items") or [])
-        return jsonify({"result": analysis})
+        return _json({"plans": data, "result": analysis})
 
+    # Install check and page warm-up start here in the background; the first
+    # scrape waits for them instead of the worker boot
+    warm_pool(HTML_PATH, file_url=HTML_FILE_URL)
     return app
 
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "5000"))
     app = create_app()
-    app.run(host="0.0.0.0", port=port, debug=True)
+    if os.environ.get("FLASK_ENV") == "development":
+        app.run(host="0.0.0.0", port=port, debug=True)
+    else:
+        # Threaded production server; one process so the browser pool isn't duplicated
+        from waitress import serve
+        serve(app, host="0.0.0.0", port=port, threads=int(os.environ.get("THREADS", "8")))
 
 
@@ -1,167 +1,547 @@
+import asyncio
+import heapq
 import math
-import time
+import os
+import re
 import sys
 import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 # Keep a persistent Playwright browser to avoid cold starts
 _PLAY: Optional[Tuple[Any, Any, Any]] = None  # (p, browser, context)
+# Pre-navigated pages handed out one per scrape: (page, file URL, mtime_ns, uses)
+_PAGE_POOL: "asyncio.Queue[Tuple[Any, str, int, int]]" = asyncio.Queue()
+_PAGE_RELOAD_EVERY = 50
+_POOL_PAGES = 0
+_POOL_LOCK = asyncio.Lock()
+# All Playwright calls run on one event loop in a daemon thread so Flask's
+# worker threads can share the browser
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+_RUNTIME_READY = False
+
+# Scrape results keyed by (path, mtime_ns, size): (expires_at, data). The page
+# renders live plans, so entries only absorb bursts of polls within a 30s round;
+# mtime and size additionally invalidate on edits to the file
+_RESULT_CACHE: "OrderedDict[Tuple[str, int, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_RESULT_CACHE_MAX = 8
+_RESULT_TTL = 1.5
+# Scrapes in progress under the same key; concurrent callers wait on the first one
+_INFLIGHT: Dict[Tuple[str, int, int], "Future[Dict[str, Any]]"] = {}
+_INFLIGHT_LOCK = threading.Lock()
+# Static-parse outcome per path: ((mtime_ns, size), result or None when the parse
+# found no cards). The file only changes on edits, so it is parsed once per version
+_STATIC_CACHE: Dict[str, Tuple[Tuple[int, int], Optional[Dict[str, Any]]]] = {}
+
+_RE_PCT = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+_RE_HITRATE = re.compile(r"hit\s*rate[^\d]*(\d{1,3}(?:\.\d+)?)%", re.I)
+_RE_TRADE = re.compile(r"trade[^\d]*(\d+[\d,]*)", re.I)
+_RE_PLAN = re.compile(r"plan\s*[:\-]?\s*([^|\n\r]+)", re.I)
+_RE_TRADE_LABEL = re.compile(r"trade", re.I)
+_RE_PLAN_LABEL = re.compile(r"\bplan\b", re.I)
+_RE_TRADE_NODE = re.compile(r"(\d+[\d,]*)(?:\s*trades?)?", re.I)
+
+# Digits 6-9 read as Big and 0-5 as Small; plan text is lowercased first so the
+# uppercase tags can't collide with the original characters
+_TRANS = str.maketrans({**dict.fromkeys("6789", "B"), **dict.fromkeys("012345", "S")})
+# Indexed by (big_word << 3) | (small_word << 2) | (big_digit << 1) | small_digit;
+# an unambiguous word wins, otherwise an unambiguous digit hint, otherwise None
+_VOTE_TABLE: Tuple[Optional[str], ...] = tuple(
+    "Big" if c & 0b1100 == 0b1000
+    else "Small" if c & 0b1100 == 0b0100
+    else "Big" if c & 0b0011 == 0b0010
+    else "Small" if c & 0b0011 == 0b0001
+    else None
+    for c in range(16)
+)
+
 
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="playwright-loop", daemon=True).start()
+            _LOOP = loop
+    return _LOOP
 
-def _launch():
+
+def run_coro(coro) -> Any:
+    """Run a coroutine on the shared Playwright loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+async def _launch():
     global _PLAY
-    from playwright.sync_api import sync_playwright
+    from playwright.async_api import async_playwright
     if _PLAY is None:
-        p = sync_playwright().start()
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
+        p = await async_playwright().start()
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
         _PLAY = (p, browser, context)
-    else:
-        p, browser, context = _PLAY
-    page = context.new_page()
-    return p, browser, context, page
+    return _PLAY
 
 
 def _ensure_playwright_runtime() -> None:
+    global _RUNTIME_READY
+    if _RUNTIME_READY:
+        return
     try:
         import playwright  # noqa: F401
     except Exception:
         subprocess.check_call([sys.executable, "-m", "pip", "install", "playwright"])  # install lib
-    # Ensure chromium is installed
-    try:
-        subprocess.check_call([sys.executable, "-m", "playwright", "install", "chromium", "--with-deps"])  # --with-deps harmless on Windows
-    except Exception:
-        subprocess.check_call([sys.executable, "-m", "playwright", "install", "chromium"])  # fallback
+    # Ensure the chromium revision this driver expects is installed; a no-op when
+    # it already is. System deps are left to the build step
+    subprocess.check_call([sys.executable, "-m", "playwright", "install", "chromium"])
+    _RUNTIME_READY = True
 
 
 def _to_file_url(path: Path) -> str:
     return path.resolve().as_uri()
 
 
-def _click_by_text(page, text: str) -> bool:
+def _page_url(html_path: Path, file_url: Optional[str] = None) -> str:
+    return file_url or _to_file_url(html_path) + "#/wingo_30s"
+
+
+async def _click_by_text(page, text: str) -> bool:
     try:
         locator = page.get_by_text(text, exact=False)
-        locator.first.click(timeout=8000)
+        await locator.first.click(timeout=8000)
         return True
     except Exception:
         return False
 
 
-def _wait_ready(page) -> None:
-    deadline = time.time() + 15
-    while time.time() < deadline:
-        for c in ("Pred. Results", "Plans", "Draws"):
-            try:
-                if page.get_by_text(c, exact=False).count() > 0:
-                    return
-            except Exception:
-                pass
-        time.sleep(0.2)
-
-
-def _extract(page) -> List[Dict[str, Any]]:
-    script = r"""
-        () => {
-          const labelMatches = Array.from(document.querySelectorAll('*'))
-            .filter(el => /hit\s*rate/i.test(el.textContent || ''));
-          const containers = new Set();
-          function closestContainer(node) {
-            if (!node) return null;
-            return node.closest('li, article, section, div, tr, tbody, card, .card, .item, .row');
-          }
-          for (const el of labelMatches) {
-            const c = closestContainer(el);
-            if (c) containers.add(c);
-          }
-          const unique = Array.from(containers);
-          function extractFromContainer(c) {
-            const text = (c.innerText || '').replace(/\s+/g, ' ').trim();
-            let name = '';
-            const title = c.querySelector('h1,h2,h3,h4,h5,strong,b,.name,.title');
-            if (title && title.textContent) {
-              name = title.textContent.trim();
-            } else {
-              const parts = text.split(/\s{2,}|\n/).map(s => s.trim()).filter(Boolean);
-              if (parts.length) name = parts[0];
-            }
-            let hitRate = null;
-            const hitNode = Array.from(c.querySelectorAll('*')).find(el => /hit\s*rate/i.test(el.textContent || ''));
-            if (hitNode && hitNode.textContent) {
-              const m = hitNode.textContent.match(/(\d{1,3}(?:\.\d+)?)\s*%/);
-              if (m) hitRate = parseFloat(m[1]);
-            }
-            if (hitRate == null) {
-              const m = text.match(/hit\s*rate[^\d]*(\d{1,3}(?:\.\d+)?)%/i);
-              if (m) hitRate = parseFloat(m[1]);
-            }
-            let trade = null;
-            const tradeNode = Array.from(c.querySelectorAll('*')).find(el => /trade/i.test(el.textContent || ''));
-            if (tradeNode && tradeNode.textContent) {
-              const m2 = tradeNode.textContent.match(/(\d+[\d,]*)(?:\s*trades?)?/i);
-              if (m2) trade = parseFloat(m2[1].replace(/,/g, ''));
-            }
-            if (trade == null) {
-              const m2 = text.match(/trade[^\d]*(\d+[\d,]*)/i);
-              if (m2) trade = parseFloat(m2[1].replace(/,/g, ''));
-            }
-            let plan = '';
-            const planNode = Array.from(c.querySelectorAll('*')).find(el => /\bplan\b/i.test(el.textContent || ''));
-            if (planNode && planNode.textContent) {
-              const t = planNode.textContent.replace(/\s+/g, ' ');
-              const m3 = t.match(/plan\s*[:\-]?\s*([^|\n\r]+)/i);
-              if (m3) plan = m3[1].trim();
-            }
-            if (!plan) {
-              const m3 = text.match(/plan\s*[:\-]?\s*([^|\n\r]+)/i);
-              if (m3) plan = m3[1].trim();
-            }
-            return { name, hitRate, trade, plan, rawText: text };
-          }
-          return unique.map(extractFromContainer);
+_READY_JS = """
+    () => ['Pred. Results', 'Plans', 'Draws'].some(
+      t => document.body && document.body.innerText && document.body.innerText.includes(t)
+    )
+"""
+
+
+# Clicks each label in turn within one evaluate. Labels match an element's whole
+# trimmed text (case-insensitive), innermost first, so unrelated text that merely
+# contains a label isn't clicked. Between clicks it yields animation frames so the
+# app can commit the new tab, polling up to 2s for the next label to appear.
+# Returns how many labels were clicked, in order; the caller falls back from there
+_NAV_JS = """
+    async (labels) => {
+      const frame = () => new Promise(r => requestAnimationFrame(r));
+      const find = t => {
+        const needle = t.toLowerCase();
+        const hit = e => (e.innerText || '').trim().toLowerCase() === needle;
+        return Array.from(document.querySelectorAll('body *'))
+          .find(e => hit(e) && !Array.from(e.children).some(hit));
+      };
+      let clicked = 0;
+      for (const t of labels) {
+        const deadline = performance.now() + 2000;
+        let el = find(t);
+        while (!el && performance.now() < deadline) {
+          await frame();
+          el = find(t);
         }
-    """
-    return page.evaluate(script) or []
+        if (!el) break;
+        el.click();
+        clicked++;
+        await frame();
+      }
+      return clicked;
+    }
+"""
 
 
-def _score(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+async def _wait_ready(page) -> None:
+    # Evaluated inside Chromium each frame instead of polled over CDP from here
+    try:
+        await page.wait_for_function(_READY_JS, timeout=15000)
+    except Exception:
+        pass
+
+
+_EXTRACT_JS = r"""
+    () => {
+      const RE_HIT_LABEL = /hit\s*rate/i;
+      const RE_TRADE_LABEL = /trade/i;
+      const RE_PLAN_LABEL = /\bplan\b/i;
+      const RE_PCT = /(\d{1,3}(?:\.\d+)?)\s*%/;
+      const RE_HITRATE = /hit\s*rate[^\d]*(\d{1,3}(?:\.\d+)?)%/i;
+      const RE_TRADE_NODE = /(\d+[\d,]*)(?:\s*trades?)?/i;
+      const RE_TRADE = /trade[^\d]*(\d+[\d,]*)/i;
+      const RE_PLAN = /plan\s*[:\-]?\s*([^|\n\r]+)/i;
+
+      const labelMatches = Array.from(document.querySelectorAll('*'))
+        .filter(el => RE_HIT_LABEL.test(el.textContent || ''));
+      // container -> first hit-rate label below it in document order (the old
+      // find's pick), reused as the hit node; the container itself until one is seen
+      const containers = new Map();
+      function closestContainer(node) {
+        if (!node) return null;
+        return node.closest('li, article, section, div, tr, tbody, card, .card, .item, .row');
+      }
+      for (const el of labelMatches) {
+        const c = closestContainer(el);
+        if (!c) continue;
+        if (!containers.has(c)) containers.set(c, c);
+        if (el !== c && containers.get(c) === c) containers.set(c, el);
+      }
+      // One descent per container: first descendant matching each label, in document order
+      function scan(c, haveHit) {
+        const found = { hit: haveHit ? '' : null, trade: null, plan: null };
+        const walker = document.createTreeWalker(c, NodeFilter.SHOW_ELEMENT);
+        let node;
+        while ((node = walker.nextNode())) {
+          const t = node.textContent || '';
+          if (found.hit === null && RE_HIT_LABEL.test(t)) found.hit = t;
+          if (found.trade === null && RE_TRADE_LABEL.test(t)) found.trade = t;
+          if (found.plan === null && RE_PLAN_LABEL.test(t)) found.plan = t;
+          if (found.hit !== null && found.trade !== null && found.plan !== null) break;
+        }
+        return found;
+      }
+      function extractFromContainer(c, knownHitNode) {
+        const text = (c.innerText || '').replace(/\s+/g, ' ').trim();
+        let name = '';
+        const title = c.querySelector('h1,h2,h3,h4,h5,strong,b,.name,.title');
+        if (title && title.textContent) {
+          name = title.textContent.trim();
+        } else {
+          const parts = text.split(/\s{2,}|\n/).map(s => s.trim()).filter(Boolean);
+          if (parts.length) name = parts[0];
+        }
+        let hitRate = null;
+        if (knownHitNode !== c) {
+          const m = (knownHitNode.textContent || '').match(RE_PCT);
+          if (m) hitRate = parseFloat(m[1]);
+        }
+        const found = scan(c, hitRate != null);
+        if (hitRate == null && found.hit) {
+          const m = found.hit.match(RE_PCT);
+          if (m) hitRate = parseFloat(m[1]);
+        }
+        if (hitRate == null) {
+          const m = text.match(RE_HITRATE);
+          if (m) hitRate = parseFloat(m[1]);
+        }
+        let trade = null;
+        if (found.trade) {
+          const m2 = found.trade.match(RE_TRADE_NODE);
+          if (m2) trade = parseFloat(m2[1].replace(/,/g, ''));
+        }
+        if (trade == null) {
+          const m2 = text.match(RE_TRADE);
+          if (m2) trade = parseFloat(m2[1].replace(/,/g, ''));
+        }
+        let plan = '';
+        if (found.plan) {
+          const m3 = found.plan.replace(/\s+/g, ' ').match(RE_PLAN);
+          if (m3) plan = m3[1].trim();
+        }
+        if (!plan) {
+          const m3 = text.match(RE_PLAN);
+          if (m3) plan = m3[1].trim();
+        }
+        const score = (hitRate || 0) * (1 + Math.log1p(Math.max(trade || 0, 0)));
+        return { name, hitRate, trade, plan, score };
+      }
+      // Same ranking as _score, done here so only the top 20 cross CDP
+      return Array.from(containers, ([c, el]) => extractFromContainer(c, el))
+        .sort((a, b) => (b.score - a.score)
+          || ((b.hitRate || -1) - (a.hitRate || -1))
+          || ((b.trade || -1) - (a.trade || -1)))
+        .slice(0, 20);
+    }
+"""
+
+
+_PLANS_READY_JS = "() => document.querySelectorAll('[class*=plan], li, .card').length > 0"
+
+
+async def _extract(page) -> List[Dict[str, Any]]:
+    return await page.evaluate(_EXTRACT_JS) or []
+
+
+# Containers the JS extractor treats as a single plan card
+_CONTAINER_XPATH = (
+    "ancestor-or-self::*[self::li or self::article or self::section or self::div"
+    " or self::tr or self::tbody or self::card"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' card ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' item ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' row ')][1]"
+)
+
+
+def _text(el) -> str:
+    # Space-joined so adjacent inline elements don't run together
+    return " ".join(" ".join(el.itertext()).split())
+
+
+def _extract_lxml(html_bytes: bytes) -> List[Dict[str, Any]]:
+    """Static counterpart of _extract for pages that don't need JS to render."""
+    from lxml import html as lxml_html
+
+    doc = lxml_html.fromstring(html_bytes)
+    labels = doc.xpath(
+        r"//*[re:test(text(), 'hit\s*rate', 'i')]",
+        namespaces={"re": "http://exslt.org/regular-expressions"},
+    )
+    containers: Dict[Any, Any] = {}
+    for el in labels:
+        found = el.xpath(_CONTAINER_XPATH)
+        if found and found[0] not in containers:
+            containers[found[0]] = el
+
     out = []
-    for r in items:
-        hit = float(r.get("hitRate") or 0.0)
-        trd = float(r.get("trade") or 0.0)
-        score = hit * (1.0 + math.log1p(max(trd, 0.0)))
-        out.append({
-            "name": (r.get("name") or "").strip(),
-            "hit_rate": hit if hit else None,
-            "trade": trd if trd else None,
-            "plan": (r.get("plan") or "").strip(),
-            "score": score,
-        })
-    out.sort(key=lambda x: (x["score"], x["hit_rate"] or -1.0, x["trade"] or -1.0), reverse=True)
-    return out[:20]
-
-
-def scrape_plans(html_path: Path) -> Dict[str, Any]:
-    from playwright.sync_api import TimeoutError
-    _ensure_playwright_runtime()
-    p, browser, context, page = _launch()
+    for c, label in containers.items():
+        text = _text(c)
+        name = ""
+        title = c.xpath(
+            ".//*[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::strong or self::b"
+            " or contains(concat(' ', normalize-space(@class), ' '), ' name ')"
+            " or contains(concat(' ', normalize-space(@class), ' '), ' title ')][1]"
+        )
+        if title and title[0].text_content().strip():
+            name = title[0].text_content().strip()
+        elif text:
+            name = text
+        hit_rate = None
+        m = _RE_PCT.search(_text(label))
+        if not m:
+            m = _RE_HITRATE.search(text)
+        if m:
+            hit_rate = float(m.group(1))
+        # First descendant mentioning each label, as the JS scan does
+        trade_text = plan_text = None
+        for el in c.iterdescendants():
+            if not isinstance(el.tag, str):
+                continue
+            t = _text(el)
+            if trade_text is None and _RE_TRADE_LABEL.search(t):
+                trade_text = t
+            if plan_text is None and _RE_PLAN_LABEL.search(t):
+                plan_text = t
+            if trade_text is not None and plan_text is not None:
+                break
+        trade = None
+        m = _RE_TRADE_NODE.search(trade_text) if trade_text else None
+        if not m:
+            m = _RE_TRADE.search(text)
+        if m:
+            trade = float(m.group(1).replace(",", ""))
+        plan = ""
+        m = _RE_PLAN.search(plan_text) if plan_text else None
+        if not m:
+            m = _RE_PLAN.search(text)
+        if m:
+            plan = m.group(1).strip()
+        out.append({"name": name, "hitRate": hit_rate, "trade": trade, "plan": plan})
+    return out
+
+
+def _row(r: Dict[str, Any], hit: float, trd: float, score: float) -> Dict[str, Any]:
+    """Output shape shared by _score and _normalize."""
+    return {
+        "name": (r.get("name") or "").strip(),
+        "hit_rate": hit if hit else None,
+        "trade": trd if trd else None,
+        "plan": (r.get("plan") or "").strip(),
+        "score": score,
+    }
+
+
+def _score(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    import numpy as np
+
+    n = len(items)
+    hits = np.fromiter((float(r.get("hitRate") or 0.0) for r in items), dtype=np.float64, count=n)
+    trades = np.fromiter((float(r.get("trade") or 0.0) for r in items), dtype=np.float64, count=n)
+    scores = hits * (1.0 + np.log1p(np.maximum(trades, 0.0)))
+    # Select with partition (O(N)) and only sort the survivors; every row tied
+    # with the 20th score is kept so the tie-breakers below still decide
+    idx = np.arange(n)
+    if n > 20:
+        kth = np.partition(scores, n - 20)[n - 20]
+        idx = np.flatnonzero(scores >= kth)
+    # Descending by (score, hit_rate, trade) with missing values ranked as -1;
+    # lexsort is stable and takes its primary key last
+    order = idx[np.lexsort((
+        -np.where(trades[idx] != 0.0, trades[idx], -1.0),
+        -np.where(hits[idx] != 0.0, hits[idx], -1.0),
+        -scores[idx],
+    ))][:20]
+    return [_row(items[i], float(hits[i]), float(trades[i]), float(scores[i])) for i in order.tolist()]
+
+
+def _normalize(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rename keys on rows the browser has already scored and ranked."""
+    return [
+        _row(r, float(r.get("hitRate") or 0.0), float(r.get("trade") or 0.0), float(r.get("score") or 0.0))
+        for r in items
+    ]
+
+
+def scrape_plans(html_path: Path, file_url: Optional[str] = None) -> Dict[str, Any]:
+    """Top plans from html_path; file_url (file URI plus route hash) skips recomputing it."""
+    st = html_path.stat()
+    key = (str(html_path), st.st_mtime_ns, st.st_size)
+    with _INFLIGHT_LOCK:
+        cached = _RESULT_CACHE.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            _RESULT_CACHE.move_to_end(key)
+            return cached[1]
+        fut = _INFLIGHT.get(key)
+        leader = fut is None
+        if leader:
+            fut = Future()
+            _INFLIGHT[key] = fut
+    if not leader:
+        return fut.result()
     try:
-        page.set_default_timeout(12000)
-        page.goto(_to_file_url(html_path) + "#/wingo_30s", wait_until="load")
-        _wait_ready(page)
-        # Navigate to Pred. Results -> Plans
-        _click_by_text(page, "Pred. Results")
-        _click_by_text(page, "Plans")
-        page.wait_for_timeout(800)
-        raw = _extract(page)
+        data = _scrape_plans(html_path, file_url)
+    except BaseException as e:
+        with _INFLIGHT_LOCK:
+            del _INFLIGHT[key]
+        fut.set_exception(e)
+        raise
+    with _INFLIGHT_LOCK:
+        _RESULT_CACHE[key] = (time.monotonic() + _RESULT_TTL, data)
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > _RESULT_CACHE_MAX:
+            _RESULT_CACHE.popitem(last=False)
+        del _INFLIGHT[key]
+    fut.set_result(data)
+    return data
+
+
+def _scrape_plans(html_path: Path, file_url: Optional[str] = None) -> Dict[str, Any]:
+    # Plain HTML parse first; the live page is a SPA, so fall back to a browser
+    # when nothing is found or SCRAPER_PLAYWRIGHT=1 forces it
+    if os.environ.get("SCRAPER_PLAYWRIGHT", "0") != "1":
+        data = _scrape_static(html_path)
+        if data is not None:
+            return data
+    return _scrape_playwright(html_path, file_url)
+
+
+def _scrape_static(html_path: Path) -> Optional[Dict[str, Any]]:
+    st = html_path.stat()
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _STATIC_CACHE.get(str(html_path))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    data = None
+    raw = _extract_lxml(html_path.read_bytes())
+    if raw:
         top = _score(raw)
-        best = top[0] if top else None
-        return {"items": top, "best": best}
-    finally:
+        data = {"items": top, "best": top[0] if top else None}
+    _STATIC_CACHE[str(html_path)] = (version, data)
+    return data
+
+
+async def _open_plans(page, file_url: str) -> None:
+    from playwright.async_api import TimeoutError
+    page.set_default_timeout(12000)
+    await page.goto(file_url, wait_until="load")
+    await _wait_ready(page)
+    # Navigate to Pred. Results -> Plans
+    labels = ["Pred. Results", "Plans"]
+    try:
+        clicked = await page.evaluate(_NAV_JS, labels)
+    except Exception:
+        clicked = 0
+    # Clicks must stay in order, so resume per-label from the first miss
+    for label in labels[clicked:]:
+        await _click_by_text(page, label)
+    try:
+        await page.wait_for_function(_PLANS_READY_JS, timeout=3000)
+    except TimeoutError:
+        pass
+
+
+async def _warm_pool_async(html_path: Path, size: int, file_url: str) -> None:
+    global _POOL_PAGES
+    async with _POOL_LOCK:
+        if _POOL_PAGES >= size:
+            return
+        # The install check shells out; keep it off the loop thread
+        await asyncio.get_running_loop().run_in_executor(None, _ensure_playwright_runtime)
+        p, browser, context = await _launch()
+        mtime = html_path.stat().st_mtime_ns
+        while _POOL_PAGES < size:
+            page = await context.new_page()
+            _POOL_PAGES += 1
+            key = file_url
+            try:
+                await _open_plans(page, file_url)
+            except Exception:
+                # Still pooled; the next scrape re-opens it
+                key = ""
+            await _PAGE_POOL.put((page, key, mtime, 0))
+
+
+def _pool_size() -> int:
+    return max(int(os.environ.get("PLAN_WORKERS", "2")), 1)
+
+
+def warm_pool(html_path: Path, size: Optional[int] = None, file_url: Optional[str] = None) -> "Future[None]":
+    """Start opening `size` pages (PLAN_WORKERS, default 2) on the Plans tab of html_path.
+
+    Returns without waiting; scrapes await the same warm-up, and retry it if it failed.
+    """
+    if size is None:
+        size = _pool_size()
+    coro = _warm_pool_async(html_path, size, _page_url(html_path, file_url))
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+async def _scrape_async(html_path: Path, file_url: str) -> List[Dict[str, Any]]:
+    await _warm_pool_async(html_path, _pool_size(), file_url)
+    page, key, mtime, uses = await _PAGE_POOL.get()
+    try:
+        if page.is_closed():
+            # A closed page can't navigate again; swap in a fresh one
+            p, browser, context = await _launch()
+            key = ""
+            page = await context.new_page()
+        # Re-open when the page points at another file, the file changed, or
+        # the page has served enough scrapes that its DOM may have drifted
+        cur_mtime = html_path.stat().st_mtime_ns
+        if key != file_url or mtime != cur_mtime or uses >= _PAGE_RELOAD_EVERY:
+            key, mtime, uses = "", 0, 0
+            await _open_plans(page, file_url)
+            key, mtime = file_url, cur_mtime
+        uses += 1
+        raw = await _extract(page)
+        if not raw:
+            # _open_plans tolerates a missed tab click, so nothing extracted
+            # most likely means the page isn't on Plans; re-open it next time
+            key = ""
+        return raw
+    except Exception:
+        # Close it so the next draw replaces it; a crashed renderer would
+        # otherwise fail every scrape that picks this page
+        key = ""
         try:
-            page.close()
+            await page.close()
         except Exception:
             pass
+        raise
+    finally:
+        _PAGE_POOL.put_nowait((page, key, mtime, uses))
+
+
+def _scrape_playwright(html_path: Path, file_url: Optional[str] = None) -> Dict[str, Any]:
+    file_url = _page_url(html_path, file_url)
+    raw = run_coro(_scrape_async(html_path, file_url))
+    top = _normalize(raw)
+    best = top[0] if top else None
+    return {"items": top, "best": best}
 
 
 def analyze_big_small(items: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -170,15 +550,12 @@ def analyze_big_small(items: List[Dict[str, Any]]) -> Dict[str, Any]:
     # Map plan text to Big/Small votes using stronger heuristics
     def vote(plan: str) -> Optional[str]:
         t = (plan or "").lower()
-        if "big" in t and "small" not in t:
-            return "Big"
-        if "small" in t and "big" not in t:
-            return "Small"
-        # numeric hints (e.g., 6-9 big, 0-5 small) if present
-        if any(ch in t for ch in list("6789")) and not any(ch in t for ch in list("012345")):
-            return "Big"
-        if any(ch in t for ch in list("012345")) and not any(ch in t for ch in list("6789")):
-            return "Small"
+        # words first, then numeric hints (e.g., 6-9 big, 0-5 small) if present
+        tagged = t.translate(_TRANS)
+        code = (("big" in t) << 3) | (("small" in t) << 2) | (("B" in tagged) << 1) | ("S" in tagged)
+        side = _VOTE_TABLE[code]
+        if side:
+            return side
         # common synonyms
         if "high" in t or "up" in t:
             return "Big"
@@ -186,17 +563,31 @@ def analyze_big_small(items: List[Dict[str, Any]]) -> Dict[str, Any]:
             return "Small"
         return None
 
-    votes: List[Dict[str, Any]] = []
-    for it in items:
+    # Single pass: running side totals plus a 5-entry min-heap of the heaviest
+    # votes; -i keeps earlier items ahead on equal weight, as a stable sort would
+    big_score = 0.0
+    small_score = 0.0
+    top5: List[Tuple[float, int, Dict[str, Any]]] = []
+    for i, it in enumerate(items):
+        # A non-positive hit rate weighs nothing, so it can't move the decision
+        hit = it.get("hit_rate") or 0.0
+        if hit <= 0:
+            continue
         v = vote(it.get("plan") or "")
         if not v:
             continue
-        # Emphasize high hit-rate and non-trivial trade; small epsilon to avoid zeroing
-        weight = (max(it.get("hit_rate") or 0.0, 0.0) ** 1.15) * (1.0 + math.log1p(max(it.get("trade") or 0.0, 0.0)))
-        votes.append({"side": v, "weight": weight, "name": it.get("name"), "plan": it.get("plan")})
+        # Emphasize high hit-rate and non-trivial trade
+        weight = math.pow(hit, 1.15) * (1.0 + math.log1p(max(it.get("trade") or 0.0, 0.0)))
+        if v == "Big":
+            big_score += weight
+        else:
+            small_score += weight
+        entry = (weight, -i, {"side": v, "weight": weight, "name": it.get("name"), "plan": it.get("plan")})
+        if len(top5) < 5:
+            heapq.heappush(top5, entry)
+        elif entry > top5[0]:
+            heapq.heapreplace(top5, entry)
 
-    big_score = sum(v["weight"] for v in votes if v["side"] == "Big")
-    small_score = sum(v["weight"] for v in votes if v["side"] == "Small")
     total = big_score + small_score
     if total <= 0:
         return {"decision": None, "confidence": 0.0, "reasons": []}
@@ -208,8 +599,7 @@ def analyze_big_small(items: List[Dict[str, Any]]) -> Dict[str, Any]:
         confidence = small_score / total
 
     # Top contributors
-    votes.sort(key=lambda x: x["weight"], reverse=True)
-    reasons = votes[:5]
+    reasons = [entry[2] for entry in sorted(top5, reverse=True)]
     return {"decision": decision, "confidence": confidence, "reasons": reasons}
 
 